@@ -1,4 +1,4 @@
 """API路由"""
-from . import chat, plugins
+from . import chat, logs, plugins, sessions
 
-__all__ = ["chat", "plugins"]
+__all__ = ["chat", "logs", "plugins", "sessions"]
@@ -1,8 +1,12 @@
 """聊天API"""
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import time
+from collections import deque
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
 from nanobot.core.agent import get_agent_manager
 
@@ -34,7 +38,8 @@ async def chat_stream(request: ChatRequest):
     
     async def generate() -> AsyncGenerator[str, None]:
         async for chunk in agent.chat_stream(request.message, request.session_id):
-            yield f"data: {chunk}\n\n"
+            # 分块可能包含换行，每行一个 data 字段
+            yield "".join(f"data: {line}\n" for line in chunk.split("\n")) + "\n"
     
     return StreamingResponse(
         generate(),
@@ -44,3 +49,148 @@ async def chat_stream(request: ChatRequest):
             "Connection": "keep-alive",
         }
     )
+
+
+# WebSocket 多路复用对话
+WS_PING_INTERVAL = 20       # 服务端心跳间隔（秒）
+WS_IDLE_TIMEOUT = 60        # 超过该时间没有收到任何消息则断开
+WS_MAX_INFLIGHT = 4         # 每个连接同时进行的对话数
+WS_SEND_QUEUE_SIZE = 64     # 每个连接的发送队列，满了会反压agent输出
+WS_CONTROL_QUEUE_SIZE = 256 # 控制帧队列，超出说明客户端不读，直接断开
+
+
+class ChatConnection:
+    """
+    一个WebSocket连接，可同时承载多个会话
+
+    客户端 -> 服务端:
+      {"type": "chat", "id": "...", "session_id": "...", "message": "..."}
+      {"type": "cancel", "id": "..."}
+      {"type": "pong"}
+    服务端 -> 客户端:
+      {"type": "token", "id": "...", "data": "..."}
+      {"type": "done" | "cancelled", "id": "..."}
+      {"type": "error", "id": "...", "detail": "..."}
+      {"type": "ping"}
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self._outbox: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        # 结束帧（done以外的终止/错误）和心跳不经过有界队列，保证送达
+        self._control: deque[dict[str, Any]] = deque()
+        self._control_overflow = False
+        self._wakeup = asyncio.Event()
+        self._streams: dict[str, asyncio.Task] = {}
+        self._last_seen = time.monotonic()
+
+    async def run(self):
+        sender = asyncio.create_task(self._send_loop())
+        pinger = asyncio.create_task(self._ping_loop())
+        try:
+            await self._receive_loop()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in [*self._streams.values(), sender, pinger]:
+                task.cancel()
+
+    def _notify(self, message: dict[str, Any]):
+        """不等待的发送，客户端不读时直接丢弃（仅用于非终止消息）"""
+        try:
+            self._outbox.put_nowait(message)
+            self._wakeup.set()
+        except asyncio.QueueFull:
+            pass
+
+    def _send_control(self, message: dict[str, Any]):
+        """优先发送且不丢弃；积压过多时断开连接，客户端据此结束所有请求"""
+        if len(self._control) >= WS_CONTROL_QUEUE_SIZE:
+            self._control_overflow = True
+        else:
+            self._control.append(message)
+        self._wakeup.set()
+
+    async def _enqueue(self, message: dict[str, Any]):
+        """有界发送，队列满时等待"""
+        await self._outbox.put(message)
+        self._wakeup.set()
+
+    async def _receive_loop(self):
+        while True:
+            raw = await self.websocket.receive_text()
+            self._last_seen = time.monotonic()
+            try:
+                msg = json.loads(raw)
+                msg_type = msg.get("type")
+            except (ValueError, AttributeError):
+                self._notify({"type": "error", "id": None, "detail": "Invalid message"})
+                continue
+
+            req_id = msg.get("id")
+            if msg_type == "chat":
+                self._start_stream(req_id, msg.get("message"), msg.get("session_id", "web:default"))
+            elif msg_type == "cancel":
+                task = self._streams.get(req_id) if isinstance(req_id, str) else None
+                if task:
+                    task.cancel()
+            elif msg_type == "pong":
+                pass
+            else:
+                self._notify({"type": "error", "id": req_id, "detail": f"Unknown message type: {msg_type}"})
+
+    def _start_stream(self, req_id: Any, message: Any, session_id: Any):
+        if not isinstance(req_id, str):
+            self._notify({"type": "error", "id": None, "detail": "Invalid chat message"})
+        elif not isinstance(message, str) or not isinstance(session_id, str):
+            self._send_control({"type": "error", "id": req_id, "detail": "Invalid chat message"})
+        elif req_id in self._streams:
+            self._send_control({"type": "error", "id": req_id, "detail": "Duplicate request id"})
+        elif len(self._streams) >= WS_MAX_INFLIGHT:
+            self._send_control({"type": "error", "id": req_id, "detail": "Too many concurrent requests"})
+        else:
+            self._streams[req_id] = asyncio.create_task(self._stream(req_id, message, session_id))
+
+    async def _stream(self, req_id: str, message: str, session_id: str):
+        try:
+            agent = get_agent_manager()
+            async for chunk in agent.chat_stream(message, session_id):
+                # 发送队列满时在这里等待，agent输出随之暂停
+                await self._enqueue({"type": "token", "id": req_id, "data": chunk})
+            await self._enqueue({"type": "done", "id": req_id})
+        except asyncio.CancelledError:
+            self._send_control({"type": "cancelled", "id": req_id})
+        except Exception as e:
+            self._send_control({"type": "error", "id": req_id, "detail": str(e)})
+        finally:
+            self._streams.pop(req_id, None)
+
+    async def _send_loop(self):
+        while True:
+            if self._control_overflow:
+                await self.websocket.close(code=1008)
+                return
+            if self._control:
+                message = self._control.popleft()
+            elif not self._outbox.empty():
+                message = self._outbox.get_nowait()
+            else:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self.websocket.send_json(message)
+
+    async def _ping_loop(self):
+        while True:
+            await asyncio.sleep(WS_PING_INTERVAL)
+            if time.monotonic() - self._last_seen > WS_IDLE_TIMEOUT:
+                await self.websocket.close()
+                return
+            self._send_control({"type": "ping"})
+
+
+@router.websocket("/ws")
+async def chat_ws(websocket: WebSocket):
+    """WebSocket对话，单连接多会话、增量返回"""
+    await websocket.accept()
+    await ChatConnection(websocket).run()
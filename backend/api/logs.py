@@ -0,0 +1,82 @@
+"""日志实时跟踪API"""
+import json
+from pathlib import Path
+from typing import AsyncGenerator, Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from nanobot.core.logtail import LogFilter, get_log_tail_manager
+from nanobot.core.plugins import get_plugin_manager
+
+router = APIRouter(prefix="/api/logs", tags=["logs"])
+
+LOG_KEYS = {"error": "error_log", "access": "access_log"}
+
+
+def _resolve_log_path(kind: str) -> Path:
+    """从nginx插件配置中取日志路径"""
+    pm = get_plugin_manager()
+    plugin = pm.get_plugin("nginx")
+    if not plugin:
+        raise HTTPException(status_code=404, detail="Plugin not found")
+    path = plugin.config.get("nginx", {}).get(LOG_KEYS[kind])
+    if not path:
+        raise HTTPException(status_code=404, detail=f"{LOG_KEYS[kind]} not configured")
+    return Path(path)
+
+
+@router.get("/stats")
+async def tail_stats():
+    """当前tailer及订阅数"""
+    return {"tailers": get_log_tail_manager().stats()}
+
+
+@router.get("/{kind}/stream")
+async def stream_log(
+    kind: Literal["error", "access"],
+    request: Request,
+    status: str | None = None,
+    regex: str | None = None,
+    ip: str | None = None,
+    path_prefix: str | None = None,
+    batch_size: int = Query(100, ge=1, le=1000),
+):
+    """
+    实时跟踪日志（SSE）
+    每个事件是一批匹配的行: {"lines": [...], "dropped": n}
+    读取失败时发送 error 事件: {"detail": "..."}
+    """
+    try:
+        log_filter = LogFilter(status_class=status, regex=regex, ip=ip, path_prefix=path_prefix)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    path = _resolve_log_path(kind)
+    manager = get_log_tail_manager()
+    sub = manager.subscribe(path, log_filter)
+
+    async def generate() -> AsyncGenerator[str, None]:
+        try:
+            while not await request.is_disconnected():
+                lines = await sub.next_batch(batch_size, timeout=15)
+                error = sub.take_error()
+                if error:
+                    yield f"event: error\ndata: {json.dumps({'detail': error}, ensure_ascii=False)}\n\n"
+                if lines:
+                    payload = {"lines": lines, "dropped": sub.dropped}
+                    yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+                elif not error:
+                    # 心跳，保持连接并及时发现断开
+                    yield ": ping\n\n"
+        finally:
+            manager.unsubscribe(path, sub)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        }
+    )
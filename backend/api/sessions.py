@@ -0,0 +1,36 @@
+"""会话历史API"""
+from fastapi import APIRouter, HTTPException, Query
+
+from nanobot.core.sessions import get_session_store
+
+router = APIRouter(prefix="/api/sessions", tags=["sessions"])
+
+
+@router.get("")
+async def list_sessions():
+    """列出所有会话"""
+    return {"sessions": get_session_store().list_sessions()}
+
+
+@router.get("/{session_id}/messages")
+async def get_messages(
+    session_id: str,
+    before: int | None = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    """分页获取会话历史，before 为上一页返回的 next_before"""
+    return get_session_store().history(session_id, before, limit)
+
+
+@router.delete("/{session_id}")
+async def delete_session(session_id: str):
+    """删除会话"""
+    if not get_session_store().delete_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"status": "ok"}
+
+
+@router.post("/compact")
+async def compact_sessions():
+    """执行保留策略"""
+    return get_session_store().compact()
@@ -0,0 +1,24 @@
+"""生成插件清单索引 (plugins/.manifest.json)
+
+部署前运行，服务启动时只读取索引，不再解析每个插件的YAML、不导入工具模块：
+    python build_manifest.py
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from nanobot.core.manifest import MANIFEST_FILE, build_manifest
+
+
+if __name__ == "__main__":
+    plugins_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent.parent / "plugins"
+    try:
+        manifest = build_manifest(plugins_dir)
+    except Exception as e:
+        print(f"生成插件索引失败，未写入: {e!r}")
+        sys.exit(1)
+    for name, entry in manifest["plugins"].items():
+        print(f"  {name}: {len(entry['tools'])} tools, config {(entry['config_hash'] or '-')[:12]}")
+    print(f"已写入 {plugins_dir / MANIFEST_FILE}")
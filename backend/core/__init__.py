@@ -1,3 +1,5 @@
 """核心模块"""
 from .agent import init_agent, close_agent, get_agent_manager
 from .plugins import init_plugins, get_plugin_manager
+from .logtail import init_log_tail, close_log_tail, get_log_tail_manager
+from .sessions import init_sessions, close_sessions, get_session_store
@@ -1,15 +1,20 @@
 """运维平台核心模块 - 封装nanobot agent"""
 import asyncio
+import codecs
+from contextlib import aclosing
 from pathlib import Path
 from typing import AsyncGenerator
 
+from .sessions import SessionStore
+
 
 class AgentManager:
     """nanobot Agent封装管理器 - 简化版"""
     
-    def __init__(self, workspace: Path, plugins_dir: Path):
+    def __init__(self, workspace: Path, plugins_dir: Path, session_store: SessionStore | None = None):
         self.workspace = workspace
         self.plugins_dir = plugins_dir
+        self.session_store = session_store
         self._process: asyncio.subprocess.Process | None = None
     
     async def start(self):
@@ -22,11 +27,47 @@ class AgentManager:
             self._process.terminate()
             self._process = None
     
+    def _begin_turn(self, message: str, session_id: str) -> tuple[str, str, int | None]:
+        """
+        记录用户消息，返回实际发给nanobot的 (消息, 会话key, 本轮携带摘要的检查点id)
+        """
+        store = self.session_store
+        if store is None:
+            return message, session_id, None
+        
+        store.append(session_id, "user", message)
+        agent_session, summary, checkpoint_id = store.turn_context(session_id)
+        if not summary:
+            return message, agent_session, None
+        message = f"[此前对话摘要]\n{summary}\n\n[当前消息]\n{message}"
+        return message, agent_session, checkpoint_id
+    
+    def _end_turn(
+        self, session_id: str, response: str, checkpoint_id: int | None = None, completed: bool = True
+    ):
+        """
+        记录agent回复，必要时生成新检查点
+        只有本轮正常完成（未取消、非错误）才认为摘要已送达
+        """
+        store = self.session_store
+        if store is None or not response:
+            return
+        store.append(session_id, "assistant", response)
+        if checkpoint_id is not None and completed and not response.startswith("Error:"):
+            store.mark_primed(checkpoint_id)
+        store.maybe_checkpoint(session_id)
+    
     async def chat(self, message: str, session_id: str = "web:default") -> str:
         """
         对话（同步返回完整响应）
         使用nanobot agent命令
         """
+        message, agent_session, checkpoint_id = self._begin_turn(message, session_id)
+        response = await self._run_chat(message, agent_session)
+        self._end_turn(session_id, response, checkpoint_id)
+        return response
+    
+    async def _run_chat(self, message: str, session_id: str) -> str:
         cmd = [
             "nanobot", "agent",
             "-m", message,
@@ -51,11 +92,27 @@ class AgentManager:
         except Exception as e:
             return f"Error: {str(e)}"
     
-    async def chat_stream(self, message: str, session_id: str = "web:default") -> AsyncGenerator[str, None]:
+    async def chat_stream(
+        self, message: str, session_id: str = "web:default", chunk_size: int = 1024
+    ) -> AsyncGenerator[str, None]:
         """
         流式对话（逐字返回）
         使用nanobot agent命令
         """
+        prompt, agent_session, checkpoint_id = self._begin_turn(message, session_id)
+        chunks: list[str] = []
+        completed = False
+        try:
+            async with aclosing(self._run_stream(prompt, agent_session, chunk_size)) as stream:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk
+            completed = True
+        finally:
+            # 被取消时也保存已收到的部分，但不标记摘要已送达
+            self._end_turn(session_id, "".join(chunks), checkpoint_id, completed)
+    
+    async def _run_stream(self, message: str, session_id: str, chunk_size: int) -> AsyncGenerator[str, None]:
         cmd = [
             "nanobot", "agent",
             "-m", message,
@@ -63,6 +120,8 @@ class AgentManager:
             "--no-markdown",
         ]
         
+        proc = None
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
         try:
             proc = await asyncio.create_subprocess_exec(
                 *cmd,
@@ -71,18 +130,29 @@ class AgentManager:
                 cwd=str(self.workspace),
             )
             
+            # 有数据就立即返回，不等整行
             while True:
-                line = await proc.stdout.readline()
-                if not line:
+                data = await proc.stdout.read(chunk_size)
+                if not data:
                     break
-                yield line.decode()
+                text = decoder.decode(data)
+                if text:
+                    yield text
             
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
             await proc.wait()
             
         except FileNotFoundError:
             yield "Error: nanobot command not found."
         except Exception as e:
             yield f"Error: {str(e)}"
+        finally:
+            # 被取消或提前关闭时结束子进程
+            if proc and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
 
 
 _agent_manager: AgentManager | None = None
@@ -96,10 +166,10 @@ def get_agent_manager() -> AgentManager:
     return _agent_manager
 
 
-async def init_agent(workspace: Path, plugins_dir: Path):
+async def init_agent(workspace: Path, plugins_dir: Path, session_store: SessionStore | None = None):
     """初始化AgentManager"""
     global _agent_manager
-    _agent_manager = AgentManager(workspace, plugins_dir)
+    _agent_manager = AgentManager(workspace, plugins_dir, session_store)
     await _agent_manager.start()
 
 
@@ -0,0 +1,299 @@
+"""日志实时跟踪 - 每个文件一个共享tailer，按订阅者过滤并分发"""
+import asyncio
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+# 访问日志 (combined 格式): IP - - [time] "METHOD PATH PROTO" STATUS ...
+ACCESS_LINE_RE = re.compile(r'^(\S+) \S+ \S+ \[[^\]]*\] "\S+ (\S+)[^"]*" (\d{3})')
+# 错误日志: ... client: IP, ... request: "METHOD PATH PROTO"
+ERROR_CLIENT_RE = re.compile(r"client: ([^,\s]+)")
+ERROR_REQUEST_RE = re.compile(r'request: "\S+ (\S+)')
+
+# 每次读取的最大字节数，避免轮转到大文件时一次读入内存
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class LogLine:
+    """解析后的日志行（每行只解析一次）"""
+    text: str
+    ip: str | None = None
+    path: str | None = None
+    status: str | None = None
+
+
+def parse_line(text: str) -> LogLine:
+    """解析访问日志或错误日志行"""
+    match = ACCESS_LINE_RE.match(text)
+    if match:
+        return LogLine(text, ip=match.group(1), path=match.group(2), status=match.group(3))
+
+    client = ERROR_CLIENT_RE.search(text)
+    request = ERROR_REQUEST_RE.search(text)
+    return LogLine(
+        text,
+        ip=client.group(1) if client else None,
+        path=request.group(1) if request else None,
+    )
+
+
+@dataclass(frozen=True)
+class LogFilter:
+    """服务端过滤条件，字段均为空表示不过滤"""
+    status_class: str | None = None  # 如 "5xx"
+    regex: str | None = None
+    ip: str | None = None
+    path_prefix: str | None = None
+    _pattern: re.Pattern | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.status_class and not re.fullmatch(r"[1-5]xx", self.status_class):
+            raise ValueError(f"Invalid status class: {self.status_class}")
+        # 提前编译，非法正则在订阅时就报错
+        object.__setattr__(self, "_pattern", re.compile(self.regex) if self.regex else None)
+
+    def matches(self, line: LogLine) -> bool:
+        if self.status_class and (not line.status or line.status[0] != self.status_class[0]):
+            return False
+        if self.ip and line.ip != self.ip:
+            return False
+        if self.path_prefix and not (line.path or "").startswith(self.path_prefix):
+            return False
+        if self._pattern and not self._pattern.search(line.text):
+            return False
+        return True
+
+
+class Subscriber:
+    """订阅者 - 有界缓冲区，满了丢弃最旧的行并计数，绝不阻塞tailer"""
+
+    def __init__(self, log_filter: LogFilter, buffer_size: int = 1000):
+        self.filter = log_filter
+        self.dropped = 0
+        self.error: str | None = None
+        self._buffer: deque[str] = deque(maxlen=buffer_size)
+        self._event = asyncio.Event()
+
+    def set_error(self, error: str):
+        """由tailer调用，通知读取失败"""
+        self.error = error
+        self._event.set()
+
+    def take_error(self) -> str | None:
+        error, self.error = self.error, None
+        return error
+
+    def push(self, lines: list[str]):
+        """由tailer调用，不会等待"""
+        overflow = len(self._buffer) + len(lines) - self._buffer.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self._buffer.extend(lines)
+        self._event.set()
+
+    async def next_batch(self, max_lines: int = 100, timeout: float | None = None) -> list[str]:
+        """等待并取出一批行，超时或有错误待处理时返回空列表"""
+        if not self._buffer and not self.error:
+            self._event.clear()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        count = min(max_lines, len(self._buffer))
+        return [self._buffer.popleft() for _ in range(count)]
+
+
+class LogTailer:
+    """单个日志文件的tailer，所有订阅者共享"""
+
+    def __init__(self, path: Path, poll_interval: float = 0.5):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._subscribers: set[Subscriber] = set()
+        self._task: asyncio.Task | None = None
+        self._error: str | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, sub: Subscriber):
+        self._subscribers.add(sub)
+        if self._error:
+            sub.set_error(self._error)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            self._task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        # 意外退出时清掉任务，下次订阅重新启动
+        if self._task is task:
+            self._task = None
+
+    def unsubscribe(self, sub: Subscriber):
+        self._subscribers.discard(sub)
+        if not self._subscribers:
+            self.stop()
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _dispatch(self, texts: list[str]):
+        """每行只解析一次；相同过滤条件的订阅者只判断一次"""
+        lines = [parse_line(t) for t in texts]
+        by_filter: dict[LogFilter, list[Subscriber]] = {}
+        for sub in self._subscribers:
+            by_filter.setdefault(sub.filter, []).append(sub)
+
+        for log_filter, subs in by_filter.items():
+            matched = [line.text for line in lines if log_filter.matches(line)]
+            if matched:
+                for sub in subs:
+                    sub.push(matched)
+
+    def _report_error(self, error: str | None):
+        """读取状态变化时通知订阅者，同一错误只通知一次"""
+        if error == self._error:
+            return
+        self._error = error
+        if error:
+            for sub in self._subscribers:
+                sub.set_error(error)
+
+    async def _run(self):
+        """
+        轮询文件新增内容，处理日志轮转；读取失败时下次轮询重试
+        出错或文件暂时消失时记住 inode 和字节位置，同一文件恢复后从原位置继续，
+        只有 inode 变化（轮转）或文件变短（截断）才从头读
+        """
+        f = None
+        inode = None
+        offset = 0
+        pending = b""
+        try:
+            while True:
+                try:
+                    try:
+                        st = os.stat(self.path)
+                    except FileNotFoundError:
+                        st = None
+
+                    if st is None:
+                        if f:
+                            offset = f.tell()
+                            f.close()
+                            f = None
+                    elif f is None or st.st_ino != inode or st.st_size < f.tell():
+                        if f:
+                            offset = f.tell()
+                            f.close()
+                            f = None
+                        f = open(self.path, "rb")
+                        if inode is None:
+                            # 首次打开从末尾开始
+                            f.seek(0, os.SEEK_END)
+                        elif st.st_ino == inode and st.st_size >= offset:
+                            # 同一文件（出错后恢复），从上次位置继续
+                            f.seek(offset)
+                        else:
+                            # 轮转或截断，从头开始
+                            pending = b""
+                        inode = st.st_ino
+
+                    while f:
+                        chunk = f.read(READ_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        pending += chunk
+                        *complete, pending = pending.split(b"\n")
+                        lines = [line.decode(errors="replace") for line in complete if line]
+                        if lines:
+                            self._dispatch(lines)
+                        if len(chunk) < READ_CHUNK_SIZE:
+                            break
+                        # 还有数据，先让出事件循环
+                        await asyncio.sleep(0)
+
+                    self._report_error(None)
+                except OSError as e:
+                    if f:
+                        offset = f.tell()
+                        f.close()
+                        f = None
+                    self._report_error(f"无法读取日志 {self.path}: {e}")
+
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            if f:
+                f.close()
+
+
+class LogTailManager:
+    """管理所有tailer，同一文件只有一个tailer"""
+
+    def __init__(self, poll_interval: float = 0.5, buffer_size: int = 1000):
+        self.poll_interval = poll_interval
+        self.buffer_size = buffer_size
+        self._tailers: dict[Path, LogTailer] = {}
+
+    def subscribe(self, path: Path, log_filter: LogFilter) -> Subscriber:
+        path = path.resolve()
+        tailer = self._tailers.get(path)
+        if tailer is None:
+            tailer = LogTailer(path, self.poll_interval)
+            self._tailers[path] = tailer
+        sub = Subscriber(log_filter, self.buffer_size)
+        tailer.subscribe(sub)
+        return sub
+
+    def unsubscribe(self, path: Path, sub: Subscriber):
+        path = path.resolve()
+        tailer = self._tailers.get(path)
+        if tailer:
+            tailer.unsubscribe(sub)
+            if not tailer.subscriber_count:
+                del self._tailers[path]
+
+    def stats(self) -> list[dict[str, Any]]:
+        """各tailer订阅情况"""
+        return [
+            {"path": str(path), "subscribers": t.subscriber_count}
+            for path, t in self._tailers.items()
+        ]
+
+    def close(self):
+        for tailer in self._tailers.values():
+            tailer.stop()
+        self._tailers.clear()
+
+
+_log_tail_manager: LogTailManager | None = None
+
+
+def get_log_tail_manager() -> LogTailManager:
+    """获取全局LogTailManager实例"""
+    global _log_tail_manager
+    if _log_tail_manager is None:
+        raise RuntimeError("LogTailManager not initialized")
+    return _log_tail_manager
+
+
+def init_log_tail(poll_interval: float = 0.5, buffer_size: int = 1000):
+    """初始化LogTailManager"""
+    global _log_tail_manager
+    _log_tail_manager = LogTailManager(poll_interval, buffer_size)
+
+
+def close_log_tail():
+    """关闭LogTailManager"""
+    global _log_tail_manager
+    if _log_tail_manager:
+        _log_tail_manager.close()
+        _log_tail_manager = None
@@ -0,0 +1,165 @@
+"""插件清单索引 - 预先生成，启动时只校验索引，不解析YAML也不导入工具模块"""
+import hashlib
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+MANIFEST_FILE = ".manifest.json"
+MANIFEST_VERSION = 1
+
+# 参与校验的插件文件，另外还有 tools/ 下的所有 .py
+TRACKED_FILES = ("config.yaml", "SKILL.md")
+
+
+def _stat(path: Path) -> list[int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def tools_fingerprint(path: Path) -> dict[str, list[int] | None]:
+    """工具源码的 (大小, 修改时间)，工具参数定义来自这些文件"""
+    tools_dir = path / "tools"
+    if not tools_dir.is_dir():
+        return {}
+    return {
+        str(f.relative_to(tools_dir)): _stat(f)
+        for f in sorted(tools_dir.rglob("*.py"))
+    }
+
+
+def fingerprint(path: Path) -> dict[str, Any]:
+    """插件文件的 (大小, 修改时间)，只需 stat，不读内容"""
+    result: dict[str, Any] = {name: _stat(path / name) for name in TRACKED_FILES}
+    result["tools"] = tools_fingerprint(path)
+    return result
+
+
+def config_hash(path: Path) -> str | None:
+    config_file = path / "config.yaml"
+    if not config_file.exists():
+        return None
+    return hashlib.sha256(config_file.read_bytes()).hexdigest()
+
+
+def parse_skill_metadata(content: str) -> dict[str, Any]:
+    """解析 SKILL.md 的 frontmatter，格式错误时返回空"""
+    import yaml
+
+    if not content.startswith("---"):
+        return {}
+    end = content.find("\n---", 3)
+    if end == -1:
+        return {}
+    try:
+        metadata = yaml.safe_load(content[3:end])
+    except yaml.YAMLError as e:
+        print(f"SKILL.md frontmatter 解析失败: {e}")
+        return {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def load_tool_specs(path: Path) -> list[dict[str, Any]]:
+    """导入插件的工具模块，收集 get_*_tools() 返回的工具定义"""
+    tools_init = path / "tools" / "__init__.py"
+    if not tools_init.exists():
+        return []
+
+    module_name = f"_ops_plugins.{path.name}.tools"
+    spec = importlib.util.spec_from_file_location(
+        module_name, tools_init, submodule_search_locations=[str(tools_init.parent)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+
+    specs = []
+    for attr in getattr(module, "__all__", dir(module)):
+        if attr.startswith("get_") and attr.endswith("_tools"):
+            for tool in getattr(module, attr)():
+                specs.append({
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.parameters,
+                })
+    return specs
+
+
+def build_entry(path: Path, tools: list[dict[str, Any]] | None = None) -> dict[str, Any]:
+    """
+    生成单个插件的索引条目；tools 为空时导入工具模块获取
+    工具模块导入失败时抛出异常，不写入看似有效的空工具列表
+    """
+    import yaml
+
+    config_file = path / "config.yaml"
+    config = {}
+    if config_file.exists():
+        with open(config_file, 'r') as f:
+            config = yaml.safe_load(f) or {}
+
+    skill_file = path / "SKILL.md"
+    skill = parse_skill_metadata(skill_file.read_text()) if skill_file.exists() else None
+
+    if tools is None:
+        tools = load_tool_specs(path)
+
+    return {
+        "name": path.name,
+        "fingerprint": fingerprint(path),
+        "config_hash": config_hash(path),
+        "config": config,
+        "skill": skill,
+        "tools": tools,
+    }
+
+
+def plugin_dirs(plugins_dir: Path) -> list[Path]:
+    if not plugins_dir.exists():
+        return []
+    return sorted(
+        item for item in plugins_dir.iterdir()
+        if item.is_dir() and not item.name.startswith(('_', '.'))
+    )
+
+
+def build_manifest(plugins_dir: Path) -> dict[str, Any]:
+    """扫描插件目录并写入索引文件；任一插件失败则不写入"""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "plugins": {path.name: build_entry(path) for path in plugin_dirs(plugins_dir)},
+    }
+    write_manifest(plugins_dir, manifest)
+    return manifest
+
+
+def write_manifest(plugins_dir: Path, manifest: dict[str, Any]):
+    target = plugins_dir / MANIFEST_FILE
+    tmp = target.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2))
+    tmp.replace(target)
+
+
+def load_manifest(plugins_dir: Path) -> dict[str, Any] | None:
+    """读取索引，不存在或版本不符返回 None"""
+    try:
+        manifest = json.loads((plugins_dir / MANIFEST_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def is_fresh(entry: dict[str, Any], path: Path) -> bool:
+    """索引条目是否与磁盘文件一致"""
+    return entry.get("fingerprint") == fingerprint(path)
+
+
+def tools_fresh(entry: dict[str, Any], path: Path) -> bool:
+    """索引中的工具定义是否仍与工具源码一致"""
+    return entry.get("fingerprint", {}).get("tools") == tools_fingerprint(path)
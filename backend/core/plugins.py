@@ -1,33 +1,40 @@
 """插件管理器"""
-import json
-import yaml
 from pathlib import Path
 from typing import Any
 
+from . import manifest as plugin_manifest
+
 
 class Plugin:
     """运维插件"""
     
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, entry: dict[str, Any] | None = None):
+        """
+        entry 为有效的索引条目；为空或过期时直接读取文件（需要解析YAML），
+        工具定义沿用旧条目，工具源码也变了则标记 tools_stale
+        """
         self.path = path
         self.name = path.name
         self.enabled = False
+        self.tools_stale = False
         
-        # 加载配置
-        config_file = path / "config.yaml"
-        if config_file.exists():
-            with open(config_file, 'r') as f:
-                self.config = yaml.safe_load(f) or {}
-        else:
-            self.config = {}
+        if entry is None or not plugin_manifest.is_fresh(entry, path):
+            old = entry
+            self.tools_stale = old is None or not plugin_manifest.tools_fresh(old, path)
+            entry = plugin_manifest.build_entry(path, tools=old["tools"] if old else [])
         
-        # 加载 Skill
-        skill_file = path / "SKILL.md"
-        if skill_file.exists():
-            with open(skill_file, 'r') as f:
-                self.skill_content = f.read()
-        else:
-            self.skill_content = ""
+        self.config: dict[str, Any] = entry["config"]
+        self.skill: dict[str, Any] | None = entry["skill"]
+        self.tools: list[dict[str, Any]] = entry["tools"]
+        self._skill_content: str | None = None
+    
+    @property
+    def skill_content(self) -> str:
+        """SKILL.md 内容，首次访问时读取"""
+        if self._skill_content is None:
+            skill_file = self.path / "SKILL.md"
+            self._skill_content = skill_file.read_text() if skill_file.exists() else ""
+        return self._skill_content
     
     def enable(self):
         """启用插件"""
@@ -42,7 +49,8 @@ class Plugin:
             "name": self.name,
             "enabled": self.enabled,
             "config": self.config,
-            "has_skill": bool(self.skill_content),
+            "has_skill": self.skill is not None,
+            "tools": self.tools,
         }
 
 
@@ -52,17 +60,26 @@ class PluginManager:
     def __init__(self, plugins_dir: Path):
         self.plugins_dir = plugins_dir
         self._plugins: dict[str, Plugin] = {}
+        self.stale_plugins: list[str] = []
         self._load_plugins()
     
     def _load_plugins(self):
-        """加载所有插件"""
-        if not self.plugins_dir.exists():
-            return
+        """
+        加载所有插件
+        优先使用索引，过期或缺失的插件回退为直接读取文件
+        """
+        manifest = plugin_manifest.load_manifest(self.plugins_dir)
+        entries = manifest["plugins"] if manifest else {}
         
-        for item in self.plugins_dir.iterdir():
-            if item.is_dir() and not item.name.startswith('_'):
-                plugin = Plugin(item)
-                self._plugins[plugin.name] = plugin
+        for item in plugin_manifest.plugin_dirs(self.plugins_dir):
+            entry = entries.get(item.name)
+            if entry is None or not plugin_manifest.is_fresh(entry, item):
+                self.stale_plugins.append(item.name)
+            plugin = Plugin(item, entry)
+            self._plugins[plugin.name] = plugin
+        
+        if self.stale_plugins:
+            print(f"插件索引缺失或过期: {', '.join(self.stale_plugins)}（运行 python build_manifest.py 重新生成）")
     
     def list_plugins(self) -> list[dict[str, Any]]:
         """列出所有插件"""
@@ -92,14 +109,32 @@ class PluginManager:
         """更新插件配置"""
         plugin = self._plugins.get(name)
         if plugin:
+            import yaml
+            
             plugin.config = config
             # 保存到文件
             config_file = plugin.path / "config.yaml"
             with open(config_file, 'w') as f:
                 yaml.dump(config, f, default_flow_style=False)
+            self._refresh_manifest(plugin)
             return True
         return False
     
+    def _refresh_manifest(self, plugin: Plugin):
+        """
+        配置变更后更新索引中该插件的条目，工具定义沿用
+        工具定义未知或已过期时删除条目，等待重新生成索引
+        """
+        manifest = plugin_manifest.load_manifest(self.plugins_dir)
+        if manifest is None:
+            return
+        if plugin.tools_stale:
+            if manifest["plugins"].pop(plugin.name, None) is None:
+                return
+        else:
+            manifest["plugins"][plugin.name] = plugin_manifest.build_entry(plugin.path, tools=plugin.tools)
+        plugin_manifest.write_manifest(self.plugins_dir, manifest)
+    
     def get_enabled_plugins(self) -> list[str]:
         """获取已启用的插件名"""
         return [p.name for p in self._plugins.values() if p.enabled]
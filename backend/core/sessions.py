@@ -0,0 +1,261 @@
+"""会话历史存储 - SQLite WAL，消息体压缩，按会话分页"""
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable
+
+COMPRESS_MIN_BYTES = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    body BLOB NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS idx_messages_created ON messages (created_at);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    upto_id INTEGER NOT NULL,
+    summary BLOB NOT NULL,
+    primed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_checkpoints_session ON checkpoints (session_id, id);
+"""
+
+ROLE_LABELS = {"user": "用户", "assistant": "助手"}
+
+
+def _encode(text: str) -> tuple[bytes, int]:
+    data = text.encode()
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return zlib.compress(data), 1
+    return data, 0
+
+
+def _decode(body: bytes, compressed: int) -> str:
+    if compressed:
+        body = zlib.decompress(body)
+    return body.decode()
+
+
+def extractive_summary(previous: str, messages: list[dict[str, Any]], max_chars: int) -> str:
+    """默认摘要：上一次摘要 + 每条消息截断，超出上限时保留最新部分"""
+    parts = [previous] if previous else []
+    for msg in messages:
+        content = " ".join(msg["content"].split())
+        if len(content) > 200:
+            content = content[:200] + "…"
+        parts.append(f"{ROLE_LABELS.get(msg['role'], msg['role'])}: {content}")
+    summary = "\n".join(parts)
+    if len(summary) > max_chars:
+        summary = summary[-max_chars:]
+    return summary
+
+
+class SessionStore:
+    """
+    会话历史存储
+
+    每累计 checkpoint_every 条消息生成一次摘要检查点。
+    检查点之后agent使用新的nanobot会话，摘要随消息发送直到成功送达一次，
+    这样每轮送给agent的历史不超过一个检查点周期。
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        retention_days: int = 30,
+        max_messages: int = 2000,
+        checkpoint_every: int = 20,
+        summary_max_chars: int = 4000,
+        summarizer: Callable[[str, list[dict[str, Any]], int], str] = extractive_summary,
+    ):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self.max_messages = max_messages
+        self.checkpoint_every = checkpoint_every
+        self.summary_max_chars = summary_max_chars
+        self.summarizer = summarizer
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def append(self, session_id: str, role: str, content: str) -> int:
+        """追加一条消息，返回消息id"""
+        body, compressed = _encode(content)
+        with self._db:
+            cur = self._db.execute(
+                "INSERT INTO messages (session_id, role, body, compressed, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, role, body, compressed, time.time()),
+            )
+        return cur.lastrowid
+
+    def history(self, session_id: str, before: int | None = None, limit: int = 50) -> dict[str, Any]:
+        """
+        分页获取历史（从新到旧翻页，每页内按时间正序）
+        next_before 为空表示没有更早的消息
+        """
+        rows = self._db.execute(
+            "SELECT id, role, body, compressed, created_at FROM messages "
+            "WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (session_id, before if before is not None else 2**63 - 1, limit + 1),
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        messages = [self._row_to_message(r) for r in reversed(rows)]
+        return {
+            "messages": messages,
+            "next_before": messages[0]["id"] if has_more else None,
+        }
+
+    def list_sessions(self) -> list[dict[str, Any]]:
+        """列出所有会话"""
+        rows = self._db.execute(
+            "SELECT session_id, COUNT(*) AS message_count, MAX(created_at) AS last_active "
+            "FROM messages GROUP BY session_id ORDER BY last_active DESC"
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def delete_session(self, session_id: str) -> bool:
+        """删除会话及其检查点"""
+        with self._db:
+            cur = self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM checkpoints WHERE session_id = ?", (session_id,))
+        return cur.rowcount > 0
+
+    def latest_checkpoint(self, session_id: str) -> dict[str, Any] | None:
+        row = self._db.execute(
+            "SELECT id, upto_id, summary, primed FROM checkpoints WHERE session_id = ? ORDER BY id DESC LIMIT 1",
+            (session_id,),
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            "id": row["id"],
+            "upto_id": row["upto_id"],
+            "summary": _decode(row["summary"], 1),
+            "primed": bool(row["primed"]),
+        }
+
+    def turn_context(self, session_id: str) -> tuple[str, str | None, int | None]:
+        """
+        返回 (agent会话key, 摘要, 检查点id)
+        摘要在检查点被成功送达agent之前每轮都返回，送达后调用 mark_primed，
+        之后由nanobot会话自身保持上下文
+        """
+        cp = self.latest_checkpoint(session_id)
+        if not cp:
+            return session_id, None, None
+
+        summary = None if cp["primed"] else cp["summary"]
+        return f"{session_id}@{cp['id']}", summary, cp["id"]
+
+    def mark_primed(self, checkpoint_id: int):
+        """标记检查点摘要已送达agent"""
+        with self._db:
+            self._db.execute("UPDATE checkpoints SET primed = 1 WHERE id = ?", (checkpoint_id,))
+
+    def maybe_checkpoint(self, session_id: str) -> bool:
+        """距上个检查点的消息数达到阈值时生成新的检查点"""
+        cp = self.latest_checkpoint(session_id)
+        upto = cp["upto_id"] if cp else 0
+        if self._count_since(session_id, upto) < self.checkpoint_every:
+            return False
+
+        rows = self._db.execute(
+            "SELECT id, role, body, compressed, created_at FROM messages "
+            "WHERE session_id = ? AND id > ? ORDER BY id",
+            (session_id, upto),
+        ).fetchall()
+        messages = [self._row_to_message(r) for r in rows]
+        summary = self.summarizer(cp["summary"] if cp else "", messages, self.summary_max_chars)
+
+        with self._db:
+            self._db.execute(
+                "INSERT INTO checkpoints (session_id, upto_id, summary, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, messages[-1]["id"], zlib.compress(summary.encode()), time.time()),
+            )
+            # 只保留最新的检查点
+            self._db.execute(
+                "DELETE FROM checkpoints WHERE session_id = ? AND id < "
+                "(SELECT MAX(id) FROM checkpoints WHERE session_id = ?)",
+                (session_id, session_id),
+            )
+        return True
+
+    def compact(self) -> dict[str, int]:
+        """执行保留策略：删除过期消息，每个会话只保留最近 max_messages 条"""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._db:
+            expired = self._db.execute("DELETE FROM messages WHERE created_at < ?", (cutoff,)).rowcount
+            trimmed = self._db.execute(
+                "DELETE FROM messages WHERE id IN ("
+                "  SELECT id FROM ("
+                "    SELECT id, ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY id DESC) AS rn"
+                "    FROM messages"
+                "  ) WHERE rn > ?"
+                ")",
+                (self.max_messages,),
+            ).rowcount
+            self._db.execute(
+                "DELETE FROM checkpoints WHERE session_id NOT IN (SELECT DISTINCT session_id FROM messages)"
+            )
+        self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"expired": expired, "trimmed": trimmed}
+
+    def _count_since(self, session_id: str, after_id: int) -> int:
+        return self._db.execute(
+            "SELECT COUNT(*) FROM messages WHERE session_id = ? AND id > ?",
+            (session_id, after_id),
+        ).fetchone()[0]
+
+    def _row_to_message(self, row: sqlite3.Row) -> dict[str, Any]:
+        return {
+            "id": row["id"],
+            "role": row["role"],
+            "content": _decode(row["body"], row["compressed"]),
+            "created_at": row["created_at"],
+        }
+
+
+_session_store: SessionStore | None = None
+
+
+def get_session_store() -> SessionStore:
+    """获取全局SessionStore实例"""
+    global _session_store
+    if _session_store is None:
+        raise RuntimeError("SessionStore not initialized")
+    return _session_store
+
+
+def init_sessions(db_path: Path) -> SessionStore:
+    """初始化SessionStore，并执行一次保留策略"""
+    global _session_store
+    _session_store = SessionStore(db_path)
+    _session_store.compact()
+    return _session_store
+
+
+def close_sessions():
+    """关闭SessionStore"""
+    global _session_store
+    if _session_store:
+        _session_store.close()
+        _session_store = None
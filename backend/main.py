@@ -1,16 +1,34 @@
 """运维平台后端服务"""
 import os
 import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+_start = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from nanobot.core import init_agent, close_agent, init_plugins
-from nanobot.api import chat, plugins
+from nanobot.core import (
+    init_agent, close_agent, init_plugins, init_log_tail, close_log_tail, init_sessions, close_sessions,
+)
+from nanobot.api import chat, logs, plugins, sessions
+
+# 启动耗时分解（秒）
+startup_timings: dict[str, float] = {"imports": time.perf_counter() - _start}
+
+
+@contextmanager
+def timed(name: str):
+    """记录一个启动阶段的耗时"""
+    t0 = time.perf_counter()
+    yield
+    startup_timings[name] = time.perf_counter() - t0
+
 
 app = FastAPI(
     title="智能运维平台 API",
@@ -29,7 +47,9 @@ app.add_middleware(
 
 # 注册路由
 app.include_router(chat.router)
+app.include_router(logs.router)
 app.include_router(plugins.router)
+app.include_router(sessions.router)
 
 
 @app.on_event("startup")
@@ -40,20 +60,35 @@ async def startup_event():
     plugins_dir = Path(__file__).parent.parent / "plugins"
     
     # 初始化插件
-    init_plugins(plugins_dir)
+    with timed("plugins"):
+        init_plugins(plugins_dir)
+    
+    # 初始化日志跟踪
+    with timed("log_tail"):
+        init_log_tail()
+    
+    # 初始化会话存储
+    with timed("sessions"):
+        session_store = init_sessions(workspace / "ops-platform" / "sessions.db")
     
     # 初始化Agent（可选，简化版不需要）
-    await init_agent(workspace, plugins_dir)
+    with timed("agent"):
+        await init_agent(workspace, plugins_dir, session_store)
+    
+    startup_timings["total"] = time.perf_counter() - _start
     
     print(f"运维平台启动完成")
     print(f"  Workspace: {workspace}")
     print(f"  Plugins: {plugins_dir}")
+    print("  启动耗时: " + ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in startup_timings.items()))
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """关闭时清理"""
+    close_log_tail()
     await close_agent()
+    close_sessions()
 
 
 @app.get("/")
@@ -69,7 +104,7 @@ async def root():
 @app.get("/health")
 async def health():
     """健康检查"""
-    return {"status": "ok"}
+    return {"status": "ok", "startup_ms": {k: round(v * 1000, 1) for k, v in startup_timings.items()}}
 
 
 if __name__ == "__main__":
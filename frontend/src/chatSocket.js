@@ -0,0 +1,80 @@
+// 对话 WebSocket 客户端：单连接承载多个会话，断线自动重连
+
+let socket = null
+let connecting = null
+let nextId = 0
+const streams = new Map()
+
+const wsUrl = () => {
+  const proto = location.protocol === 'https:' ? 'wss:' : 'ws:'
+  return `${proto}//${location.host}/api/chat/ws`
+}
+
+const handleMessage = (event) => {
+  const msg = JSON.parse(event.data)
+  if (msg.type === 'ping') {
+    socket.send(JSON.stringify({ type: 'pong' }))
+    return
+  }
+
+  const stream = streams.get(msg.id)
+  if (!stream) return
+
+  if (msg.type === 'token') {
+    stream.onToken(msg.data)
+  } else {
+    streams.delete(msg.id)
+    if (msg.type === 'error') {
+      stream.onError(new Error(msg.detail))
+    } else {
+      stream.onDone(msg.type === 'cancelled')
+    }
+  }
+}
+
+const connect = () => {
+  if (socket && socket.readyState === WebSocket.OPEN) return Promise.resolve(socket)
+  if (connecting) return connecting
+
+  connecting = new Promise((resolve, reject) => {
+    const ws = new WebSocket(wsUrl())
+    ws.onopen = () => {
+      socket = ws
+      connecting = null
+      resolve(ws)
+    }
+    ws.onmessage = handleMessage
+    ws.onclose = () => {
+      if (socket === ws) socket = null
+      connecting = null
+      for (const stream of streams.values()) {
+        stream.onError(new Error('连接已断开'))
+      }
+      streams.clear()
+      reject(new Error('无法连接服务器'))
+    }
+  })
+  return connecting
+}
+
+/**
+ * 发送消息并流式接收回复
+ * 返回 cancel 函数
+ */
+export const sendMessage = async (message, sessionId, { onToken, onDone, onError }) => {
+  const id = `req-${++nextId}`
+  streams.set(id, { onToken, onDone, onError })
+
+  try {
+    const ws = await connect()
+    ws.send(JSON.stringify({ type: 'chat', id, session_id: sessionId, message }))
+  } catch (err) {
+    if (streams.delete(id)) onError(err)
+  }
+
+  return () => {
+    if (socket && streams.has(id)) {
+      socket.send(JSON.stringify({ type: 'cancel', id }))
+    }
+  }
+}
@@ -1,4 +1,5 @@
 """Nginx工具模块"""
 from .nginx_tool import get_nginx_tools, load_config
+from .result import Section, ToolResult
 
-__all__ = ["get_nginx_tools", "load_config"]
+__all__ = ["get_nginx_tools", "load_config", "Section", "ToolResult"]
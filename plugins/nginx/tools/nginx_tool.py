@@ -1,7 +1,9 @@
 """Nginx 运维工具 - Python Tool 实现"""
+import abc
 import asyncio
 import re
 import yaml
+from collections import Counter
 from pathlib import Path
 from typing import Any
 
@@ -12,22 +14,60 @@ except ImportError:
 
 from nanobot.agent.tools.base import Tool
 
+from .result import FORMATS, Section, ToolResult
 
-class NginxStatusTool(Tool):
-    """检查nginx运行状态"""
+# 所有工具共享的输出参数
+OUTPUT_PROPERTIES = {
+    "format": {
+        "type": "string",
+        "enum": list(FORMATS),
+        "description": "输出格式：digest(按token预算截断的摘要)、text(文本)、json(紧凑JSON)",
+    },
+    "max_tokens": {
+        "type": "integer",
+        "description": "digest/json 输出的token预算",
+    },
+}
+
+
+class NginxTool(Tool, abc.ABC):
+    """nginx工具基类 - 子类实现 run() 返回结构化结果"""
     
-    name = "nginx_status"
-    description = "检查nginx进程运行状态"
-    parameters = {
+    def __init__(self, config: dict[str, Any] | None = None):
+        self.config = config or {}
+    
+    @property
+    def nginx_config(self) -> dict[str, Any]:
+        return self.config.get("nginx", {})
+    
+    @abc.abstractmethod
+    async def run(self, **kwargs: Any) -> ToolResult:
+        """执行并返回结构化结果"""
+    
+    async def execute(self, format: str | None = None, max_tokens: int | None = None, **kwargs: Any) -> str:
+        output = self.config.get("output", {})
+        fmt = format or output.get("format", "digest")
+        budget = max_tokens or output.get("max_tokens", 300)
+        result = await self.run(**kwargs)
+        return result.render(fmt, budget)
+
+
+def _schema(properties: dict[str, Any] | None = None) -> dict[str, Any]:
+    return {
         "type": "object",
-        "properties": {},
+        "properties": {**(properties or {}), **OUTPUT_PROPERTIES},
         "required": [],
     }
+
+
+class NginxStatusTool(NginxTool):
+    """检查nginx运行状态"""
     
-    def __init__(self, config: dict[str, Any] | None = None):
-        self.config = config or {}
+    name = "nginx_status"
+    description = "检查nginx进程运行状态"
+    parameters = _schema()
     
-    async def execute(self, **kwargs: Any) -> str:
+    async def run(self, **kwargs: Any) -> ToolResult:
         cmd = ["pgrep", "-f", "nginx: master"]
         proc = await asyncio.create_subprocess_exec(
             *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
@@ -35,26 +75,19 @@ class NginxStatusTool(Tool):
         stdout, _ = await proc.communicate()
         
         if stdout.strip():
-            return "✓ Nginx 进程正在运行"
-        return "✗ Nginx 进程未运行"
+            return ToolResult(True, "✓ Nginx 进程正在运行")
+        return ToolResult(False, "✗ Nginx 进程未运行")
 
 
-class NginxTestConfigTool(Tool):
+class NginxTestConfigTool(NginxTool):
     """测试nginx配置"""
     
     name = "nginx_test_config"
     description = "检查nginx配置文件语法"
-    parameters = {
-        "type": "object",
-        "properties": {},
-        "required": [],
-    }
+    parameters = _schema()
     
-    def __init__(self, config: dict[str, Any] | None = None):
-        self.config = config or {}
-    
-    async def execute(self, **kwargs: Any) -> str:
-        nginx_bin = self.config.get("nginx", {}).get("binary", "nginx")
+    async def run(self, **kwargs: Any) -> ToolResult:
+        nginx_bin = self.nginx_config.get("binary", "nginx")
         cmd = [nginx_bin, "-t"]
         proc = await asyncio.create_subprocess_exec(
             *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
@@ -64,26 +97,19 @@ class NginxTestConfigTool(Tool):
         output = stdout.decode() + stderr.decode()
         
         if proc.returncode == 0:
-            return f"✓ 配置检查通过\n{output}"
-        return f"✗ 配置错误\n{output}"
+            return ToolResult(True, "✓ 配置检查通过", detail=output)
+        return ToolResult(False, "✗ 配置错误", detail=output)
 
 
-class NginxReloadTool(Tool):
+class NginxReloadTool(NginxTool):
     """平滑重载nginx配置"""
     
     name = "nginx_reload"
     description = "平滑重载nginx配置（不中断服务）"
-    parameters = {
-        "type": "object",
-        "properties": {},
-        "required": [],
-    }
-    
-    def __init__(self, config: dict[str, Any] | None = None):
-        self.config = config or {}
+    parameters = _schema()
     
-    async def execute(self, **kwargs: Any) -> str:
-        nginx_bin = self.config.get("nginx", {}).get("binary", "nginx")
+    async def run(self, **kwargs: Any) -> ToolResult:
+        nginx_bin = self.nginx_config.get("binary", "nginx")
         cmd = [nginx_bin, "-s", "reload"]
         proc = await asyncio.create_subprocess_exec(
             *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
@@ -91,25 +117,18 @@ class NginxReloadTool(Tool):
         stdout, stderr = await proc.communicate()
         
         if proc.returncode == 0:
-            return "✓ Nginx 配置已重载"
-        return f"✗ 重载失败: {stderr.decode()}"
+            return ToolResult(True, "✓ Nginx 配置已重载")
+        return ToolResult(False, "✗ 重载失败", detail=stderr.decode())
 
 
-class NginxRestartTool(Tool):
+class NginxRestartTool(NginxTool):
     """重启nginx"""
     
     name = "nginx_restart"
     description = "重启nginx服务"
-    parameters = {
-        "type": "object",
-        "properties": {},
-        "required": [],
-    }
-    
-    def __init__(self, config: dict[str, Any] | None = None):
-        self.config = config or {}
+    parameters = _schema()
     
-    async def execute(self, **kwargs: Any) -> str:
+    async def run(self, **kwargs: Any) -> ToolResult:
         cmd = ["systemctl", "restart", "nginx"]
         proc = await asyncio.create_subprocess_exec(
             *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
@@ -117,32 +136,25 @@ class NginxRestartTool(Tool):
         _, stderr = await proc.communicate()
         
         if proc.returncode == 0:
-            return "✓ Nginx 已重启"
-        return f"✗ 重启失败: {stderr.decode()}"
+            return ToolResult(True, "✓ Nginx 已重启")
+        return ToolResult(False, "✗ 重启失败", detail=stderr.decode())
 
 
-class NginxErrorSummaryTool(Tool):
+class NginxErrorSummaryTool(NginxTool):
     """nginx错误日志统计"""
     
     name = "nginx_error_summary"
     description = "统计nginx错误日志"
-    parameters = {
-        "type": "object",
-        "properties": {
-            "lines": {
-                "type": "integer",
-                "description": "读取的行数",
-                "default": 100,
-            }
-        },
-        "required": [],
-    }
+    parameters = _schema({
+        "lines": {
+            "type": "integer",
+            "description": "读取的行数",
+            "default": 100,
+        }
+    })
     
-    def __init__(self, config: dict[str, Any] | None = None):
-        self.config = config or {}
-    
-    async def execute(self, lines: int = 100, **kwargs: Any) -> str:
-        error_log = self.config.get("nginx", {}).get("error_log", "/var/log/nginx/error.log")
+    async def run(self, lines: int = 100, **kwargs: Any) -> ToolResult:
+        error_log = self.nginx_config.get("error_log", "/var/log/nginx/error.log")
         
         try:
             cmd = ["tail", f"-n{lines}", error_log]
@@ -152,54 +164,46 @@ class NginxErrorSummaryTool(Tool):
             stdout, stderr = await proc.communicate()
             
             if proc.returncode != 0:
-                return f"✗ 无法读取错误日志: {stderr.decode()}"
+                return ToolResult(False, "✗ 无法读取错误日志", detail=stderr.decode())
             
             content = stdout.decode()
             if not content.strip():
-                return "没有错误日志"
+                return ToolResult(True, "没有错误日志")
             
-            error_counts: dict[str, int] = {}
+            error_counts: Counter = Counter()
             for line in content.split("\n"):
                 match = re.search(r"(\d{4}/\d{2}/\d{2}\s+\d{2}:\d{2}:\d{2})\s+\[(\w+)\]\s+(.*)", line)
                 if match:
-                    error_type = match.group(3)[:50]
-                    error_counts[error_type] = error_counts.get(error_type, 0) + 1
+                    error_counts[match.group(3)[:50]] += 1
             
             if not error_counts:
-                return f"最近{lines}行没有错误"
+                return ToolResult(True, f"最近{lines}行没有错误")
             
-            sorted_errors = sorted(error_counts.items(), key=lambda x: x[1], reverse=True)
-            result = f"错误日志统计 (最近{lines}行):\n"
-            for error, count in sorted_errors[:10]:
-                result += f"  {count:4d}x  {error}\n"
-            return result
+            return ToolResult(
+                True,
+                f"错误日志统计 (最近{lines}行):",
+                [Section("错误", error_counts.most_common(), limit=10)],
+            )
             
         except FileNotFoundError:
-            return f"✗ 错误日志文件不存在: {error_log}"
+            return ToolResult(False, f"✗ 错误日志文件不存在: {error_log}")
 
 
-class NginxAccessStatsTool(Tool):
+class NginxAccessStatsTool(NginxTool):
     """nginx访问日志统计"""
     
     name = "nginx_access_stats"
     description = "统计nginx访问日志"
-    parameters = {
-        "type": "object",
-        "properties": {
-            "lines": {
-                "type": "integer",
-                "description": "读取的行数",
-                "default": 1000,
-            }
-        },
-        "required": [],
-    }
+    parameters = _schema({
+        "lines": {
+            "type": "integer",
+            "description": "读取的行数",
+            "default": 1000,
+        }
+    })
     
-    def __init__(self, config: dict[str, Any] | None = None):
-        self.config = config or {}
-    
-    async def execute(self, lines: int = 1000, **kwargs: Any) -> str:
-        access_log = self.config.get("nginx", {}).get("access_log", "/var/log/nginx/access.log")
+    async def run(self, lines: int = 1000, **kwargs: Any) -> ToolResult:
+        access_log = self.nginx_config.get("access_log", "/var/log/nginx/access.log")
         
         try:
             cmd = ["tail", f"-n{lines}", access_log]
@@ -209,90 +213,90 @@ class NginxAccessStatsTool(Tool):
             stdout, stderr = await proc.communicate()
             
             if proc.returncode != 0:
-                return f"✗ 无法读取访问日志: {stderr.decode()}"
+                return ToolResult(False, "✗ 无法读取访问日志", detail=stderr.decode())
             
             content = stdout.decode()
             if not content.strip():
-                return "没有访问日志"
+                return ToolResult(True, "没有访问日志")
             
-            ip_counts: dict[str, int] = {}
-            url_counts: dict[str, int] = {}
-            status_counts: dict[str, int] = {}
+            ip_counts: Counter = Counter()
+            url_counts: Counter = Counter()
+            status_counts: Counter = Counter()
             
             for line in content.split("\n"):
                 parts = line.split()
                 if len(parts) >= 9:
-                    ip = parts[0]
-                    status = parts[8]
-                    url = parts[6]
-                    
-                    ip_counts[ip] = ip_counts.get(ip, 0) + 1
-                    url_counts[url] = url_counts.get(url, 0) + 1
-                    if status.isdigit():
-                        status_counts[status] = status_counts.get(status, 0) + 1
-            
-            result = f"访问日志统计 (最近{lines}行):\n\n"
-            
-            result += "TOP IP:\n"
-            for ip, count in sorted(ip_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
-                result += f"  {count:5d}x  {ip}\n"
+                    ip_counts[parts[0]] += 1
+                    url_counts[parts[6]] += 1
+                    if parts[8].isdigit():
+                        status_counts[parts[8]] += 1
             
-            result += "\nTOP URL:\n"
-            for url, count in sorted(url_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
-                result += f"  {count:5d}x  {url}\n"
-            
-            result += "\n状态码:\n"
-            for status, count in sorted(status_counts.items(), key=lambda x: x[1], reverse=True):
-                result += f"  {count:5d}x  {status}\n"
+            # 状态码按严重程度优先（5xx > 4xx > 其他），同级按次数
+            statuses = sorted(
+                status_counts.items(),
+                key=lambda x: (x[0][0] not in "54", -int(x[0][0]), -x[1]),
+            )
             
-            return result
+            return ToolResult(
+                True,
+                f"访问日志统计 (最近{lines}行):",
+                [
+                    Section("TOP IP", ip_counts.most_common(), limit=5),
+                    Section("TOP URL", url_counts.most_common(), limit=5),
+                    Section("状态码", statuses),
+                ],
+            )
             
         except FileNotFoundError:
-            return f"✗ 访问日志文件不存在: {access_log}"
+            return ToolResult(False, f"✗ 访问日志文件不存在: {access_log}")
 
 
-class NginxConnectionsTool(Tool):
+class NginxConnectionsTool(NginxTool):
     """nginx连接状态（需要stub_status）"""
     
     name = "nginx_connections"
     description = "查看nginx连接状态（需要配置stub_status）"
-    parameters = {
-        "type": "object",
-        "properties": {},
-        "required": [],
-    }
-    
-    def __init__(self, config: dict[str, Any] | None = None):
-        self.config = config or {}
+    parameters = _schema()
     
-    async def execute(self, **kwargs: Any) -> str:
-        status_url = self.config.get("nginx", {}).get("status_url", "http://127.0.0.1/nginx_status")
+    async def run(self, **kwargs: Any) -> ToolResult:
+        status_url = self.nginx_config.get("status_url", "http://127.0.0.1/nginx_status")
         
         if not aiohttp:
-            return "✗ 需要安装 aiohttp: pip install aiohttp"
+            return ToolResult(False, "✗ 需要安装 aiohttp: pip install aiohttp")
         
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.get(status_url) as resp:
                     if resp.status != 200:
-                        return f"✗ stub_status 返回 {resp.status}"
+                        return ToolResult(False, f"✗ stub_status 返回 {resp.status}")
                     
                     text = await resp.text()
                     
-                    result = "Nginx 连接状态:\n"
-                    
-                    for line in text.split("\n"):
-                        if "Active connections" in line:
-                            result += f"  {line.strip()}\n"
-                        elif "server accepts" in line:
-                            result += f"  {line.strip()}\n"
-                        elif "Reading" in line:
-                            result += f"  {line.strip()}\n"
-                    
-                    return result
-                    
         except aiohttp.ClientError as e:
-            return f"✗ 无法连接 stub_status: {e}"
+            return ToolResult(False, f"✗ 无法连接 stub_status: {e}")
+        
+        rows = parse_stub_status(text)
+        if not rows:
+            return ToolResult(False, "✗ 无法解析 stub_status 输出", detail=text)
+        return ToolResult(True, "Nginx 连接状态:", [Section("连接", rows, counts=False)])
+
+
+STUB_ACTIVE_RE = re.compile(r"Active connections:\s*(\d+)")
+STUB_COUNTERS_RE = re.compile(r"server accepts handled requests\s+(\d+)\s+(\d+)\s+(\d+)")
+STUB_STATES_RE = re.compile(r"(Reading|Writing|Waiting):\s*(\d+)")
+
+
+def parse_stub_status(text: str) -> list[tuple[str, int]]:
+    """解析 stub_status 输出，不是 stub_status 格式时返回空列表"""
+    rows: list[tuple[str, int]] = []
+    match = STUB_ACTIVE_RE.search(text)
+    if match:
+        rows.append(("active", int(match.group(1))))
+    match = STUB_COUNTERS_RE.search(text)
+    if match:
+        rows.extend(zip(("accepts", "handled", "requests"), map(int, match.groups())))
+    rows.extend((k.lower(), int(v)) for k, v in STUB_STATES_RE.findall(text))
+    return rows
 
 
 def load_config() -> dict[str, Any]:
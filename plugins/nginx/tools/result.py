@@ -0,0 +1,155 @@
+"""工具结果 - 结构化结果，可渲染为 JSON / 文本 / 限定token的摘要"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+FORMATS = ("digest", "text", "json")
+
+_CJK_RE = re.compile(r"[\u2e80-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：中文约1字1token，其余约4字符1token"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@dataclass
+class Section:
+    """一组统计行，rows 按重要性从高到低排列"""
+    title: str
+    rows: list[tuple[str, int]] = field(default_factory=list)
+    counts: bool = True  # True: 计数行 "  15x  label"；False: 键值行 "  label: 15"
+    limit: int | None = None  # 文本模式最多显示的行数
+
+    def row_text(self, label: str, value: int) -> str:
+        if self.counts:
+            return f"  {value:5d}x  {label}"
+        return f"  {label}: {value}"
+
+
+@dataclass
+class ToolResult:
+    """工具执行结果"""
+    ok: bool
+    summary: str
+    sections: list[Section] = field(default_factory=list)
+    detail: str = ""
+
+    def render(self, fmt: str = "digest", max_tokens: int | None = None) -> str:
+        if fmt == "json":
+            return self.to_json(max_tokens)
+        if fmt == "text":
+            return self.to_text()
+        return self.to_digest(max_tokens)
+
+    def to_dict(self, max_tokens: int | None = None) -> dict[str, Any]:
+        """结构化结果；给定预算时按紧凑JSON编码计算大小"""
+        rows, omitted, detail = self._select(max_tokens, json_mode=True)
+        return self._as_dict(rows, omitted, detail)
+
+    def to_json(self, max_tokens: int | None = None) -> str:
+        return _dumps(self.to_dict(max_tokens))
+
+    def to_text(self) -> str:
+        """文本，每段按 limit 截断"""
+        rows = [s.rows[:s.limit] for s in self.sections]
+        omitted = [len(s.rows) - len(r) for s, r in zip(self.sections, rows)]
+        return self._format(rows, omitted, self.detail)
+
+    def to_digest(self, max_tokens: int | None = None) -> str:
+        """限定token预算的文本摘要"""
+        rows, omitted, detail = self._select(max_tokens, json_mode=False)
+        return self._format(rows, omitted, detail)
+
+    def _as_dict(self, rows: list[list[tuple[str, int]]], omitted: list[int], detail: str) -> dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "summary": self.summary,
+            "sections": [
+                {"title": s.title, "rows": rows[i], "omitted": omitted[i]}
+                for i, s in enumerate(self.sections)
+            ],
+            "detail": detail,
+        }
+
+    def _format(self, rows: list[list[tuple[str, int]]], omitted: list[int], detail: str) -> str:
+        lines = [self.summary]
+        for section, section_rows, n in zip(self.sections, rows, omitted):
+            lines.append(f"\n{section.title}:")
+            lines.extend(section.row_text(label, value) for label, value in section_rows)
+            if n:
+                lines.append(f"  …另有{n}项")
+        if detail:
+            lines.append(detail)
+        return "\n".join(lines) + "\n"
+
+    def _select(
+        self, max_tokens: int | None, json_mode: bool
+    ) -> tuple[list[list[tuple[str, int]]], list[int], str]:
+        """
+        按优先级在预算内挑选行
+        每段最多 limit 行；各段轮流取当前最重要的一行，保证每段都先保留头部。
+        行的开销按实际输出格式（文本行或JSON数组）估算
+        """
+        if max_tokens is None:
+            return [list(s.rows) for s in self.sections], [0] * len(self.sections), self.detail
+
+        n = len(self.sections)
+        if json_mode:
+            # 空结果的JSON骨架（omitted 按最长可能的数字估算）
+            skeleton = self._as_dict([[] for _ in range(n)], [len(s.rows) for s in self.sections], "")
+            budget = max_tokens - estimate_tokens(_dumps(skeleton))
+        else:
+            budget = max_tokens - estimate_tokens(self.summary)
+            budget -= sum(estimate_tokens(s.title) + 2 for s in self.sections)
+
+        def row_cost(section: Section, label: str, value: int) -> int:
+            if json_mode:
+                return estimate_tokens(_dumps([label, value])) + 1
+            return estimate_tokens(section.row_text(label, value)) + 1
+
+        candidates = [s.rows[:s.limit] for s in self.sections]
+        selected: list[list[tuple[str, int]]] = [[] for _ in self.sections]
+        # 某段当前行放不下时只停止该段，其余段继续（较短的行可能还放得下）
+        exhausted = [False] * n
+        depth = 0
+        while any(not exhausted[i] and depth < len(c) for i, c in enumerate(candidates)):
+            for i, section in enumerate(self.sections):
+                if exhausted[i] or depth >= len(candidates[i]):
+                    continue
+                label, value = candidates[i][depth]
+                cost = row_cost(section, label, value)
+                if cost > budget:
+                    exhausted[i] = True
+                    continue
+                budget -= cost
+                selected[i].append((label, value))
+            depth += 1
+
+        omitted = [len(s.rows) - len(selected[i]) for i, s in enumerate(self.sections)]
+        if not json_mode:
+            # "…另有N项" 行
+            budget -= sum(4 for k in omitted if k)
+
+        def detail_cost(text: str) -> int:
+            return estimate_tokens(_dumps(text) if json_mode else text)
+
+        detail = self.detail
+        if detail and detail_cost(detail) > budget:
+            # 详情保留开头（nginx输出的关键信息通常在前面），二分找出放得下的最长前缀
+            lo, hi = 0, len(detail)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if detail_cost(detail[:mid] + "…") <= budget:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            detail = detail[:lo] + "…" if lo else ""
+
+        return selected, omitted, detail
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))